@@ -1,53 +1,98 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import bisect
 import csv
 import json
 import os
+import sqlite3
 import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 
-import requests
+import aiohttp
+from aiolimiter import AsyncLimiter
 
+try:
+    import orjson
 
-class RateLimiter:
-    def __init__(self, rps: float):
-        self.min_interval = 1.0 / max(rps, 0.1)
-        self.last = 0.0
+    def json_loads(data: Any) -> Any:
+        return orjson.loads(data)
 
-    def wait(self):
-        now = time.time()
-        elapsed = now - self.last
-        if elapsed < self.min_interval:
-            time.sleep(self.min_interval - elapsed)
-        self.last = time.time()
+    def json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def json_loads(data: Any) -> Any:
+        return json.loads(data)
 
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
 
-def request_json(method: str, url: str, *, params=None, timeout=30, headers=None, max_attempts=5, limiter: Optional[RateLimiter] = None):
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import cysimdjson
+    _simd_parser = cysimdjson.JSONParser()
+except ImportError:
+    _simd_parser = None
+
+try:
+    import zstandard as zstd
+    _zstd_c = zstd.ZstdCompressor(level=3)
+    _zstd_d = zstd.ZstdDecompressor()
+except ImportError:
+    zstd = None
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def compress_blob(data: bytes) -> bytes:
+    if zstd is None:
+        return data
+    return _zstd_c.compress(data)
+
+
+def decompress_blob(data: bytes) -> bytes:
+    # blobs written before compression was enabled (or without zstandard
+    # installed) are stored raw, so sniff the frame magic
+    if zstd is None or not data.startswith(ZSTD_MAGIC):
+        return data
+    return _zstd_d.decompress(data)
+
+# aggregate_trades only ever reads these keys, so the cache-reload fast path
+# can skip materializing the rest of each trade object.
+TRADE_KEYS = ("timestamp", "price", "size")
+
+
+async def request_json(session: aiohttp.ClientSession, method: str, url: str, *, params=None, timeout=30, headers=None, max_attempts=5, limiter: Optional[AsyncLimiter] = None):
     backoff = 1.0
     last_err = None
     for attempt in range(1, max_attempts + 1):
         if limiter:
-            limiter.wait()
+            await limiter.acquire()
         try:
-            if method == "GET":
-                resp = requests.get(url, params=params, timeout=timeout, headers=headers)
-            else:
-                resp = requests.post(url, params=params, timeout=timeout, headers=headers)
-            if resp.status_code < 400:
-                if not resp.text:
-                    return None
-                return resp.json()
-            last_err = f"HTTP {resp.status_code}: {resp.text[:300]}"
-            if resp.status_code in (429, 500, 502, 503, 504):
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 16)
-                continue
-            raise RuntimeError(last_err)
+            async with session.request(method, url, params=params, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers) as resp:
+                text = await resp.text()
+                if resp.status < 400:
+                    if not text:
+                        return None
+                    return json_loads(text)
+                last_err = f"HTTP {resp.status}: {text[:300]}"
+                if resp.status in (429, 500, 502, 503, 504):
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 16)
+                    continue
+                raise RuntimeError(last_err)
+        except RuntimeError:
+            raise
         except Exception as e:
             last_err = str(e)
-            time.sleep(backoff)
+            await asyncio.sleep(backoff)
             backoff = min(backoff * 2, 16)
             continue
     raise RuntimeError(f"{method} {url} failed after retries: {last_err}")
@@ -56,10 +101,16 @@ def request_json(method: str, url: str, *, params=None, timeout=30, headers=None
 def read_needed_dates(daily_path: Path) -> Dict[str, List[str]]:
     needed = defaultdict(set)
     with daily_path.open() as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return {}
+        mid_idx = header.index("market_id")
+        date_idx = header.index("date")
+        # plain csv.reader avoids a fresh dict per row
         for row in reader:
-            mid = row.get("market_id", "")
-            date = row.get("date", "")
+            mid = row[mid_idx]
+            date = row[date_idx]
             if mid and date:
                 needed[mid].add(date)
     # convert to sorted lists for stable output
@@ -71,45 +122,52 @@ def cache_path(cache_dir: Path, name: str) -> Path:
     return cache_dir / name
 
 
-def fetch_gamma_market(gamma_base: str, market_id: str, timeout: int, limiter: RateLimiter, cache_dir: Path) -> Optional[Dict[str, Any]]:
-    cache_file = cache_path(cache_dir, f"gamma_{market_id}.json")
-    if cache_file.exists():
+def open_cache_db(cache_dir: Path) -> sqlite3.Connection:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(cache_dir / "cache.db")
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("CREATE TABLE IF NOT EXISTS gamma (market_id TEXT PRIMARY KEY, blob BLOB)")
+    db.execute("CREATE TABLE IF NOT EXISTS agg (condition_id TEXT PRIMARY KEY, vol BLOB, cnt BLOB, truncated INT)")
+    db.commit()
+    return db
+
+
+async def fetch_gamma_market(session: aiohttp.ClientSession, gamma_base: str, market_id: str, timeout: int, limiter: AsyncLimiter, db: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+    row = db.execute("SELECT blob FROM gamma WHERE market_id = ?", (market_id,)).fetchone()
+    if row:
         try:
-            return json.loads(cache_file.read_text())
+            return json_loads(decompress_blob(row[0]))
         except Exception:
             pass
 
     url = f"{gamma_base}/markets/{market_id}"
-    data = request_json("GET", url, timeout=timeout, limiter=limiter)
+    data = await request_json(session, "GET", url, timeout=timeout, limiter=limiter)
     if data is None:
         return None
     try:
-        cache_file.write_text(json.dumps(data))
+        db.execute("INSERT OR REPLACE INTO gamma (market_id, blob) VALUES (?, ?)", (market_id, compress_blob(json_dumps(data))))
     except Exception:
         pass
     return data
 
 
-def load_agg_cache(cache_dir: Path, condition_id: str) -> Optional[Tuple[Dict[str, float], Dict[str, int], int]]:
-    cache_file = cache_path(cache_dir, f"agg_{condition_id}.json")
-    if not cache_file.exists():
+def load_agg_cache(db: sqlite3.Connection, condition_id: str) -> Optional[Tuple[Dict[str, float], Dict[str, int], int]]:
+    row = db.execute("SELECT vol, cnt, truncated FROM agg WHERE condition_id = ?", (condition_id,)).fetchone()
+    if not row:
         return None
     try:
-        data = json.loads(cache_file.read_text())
-        return data["vol_by_date"], data["cnt_by_date"], int(data.get("truncated", 0))
+        return json_loads(decompress_blob(row[0])), json_loads(decompress_blob(row[1])), int(row[2])
     except Exception:
         return None
 
 
-def write_agg_cache(cache_dir: Path, condition_id: str, vol_by_date: Dict[str, float], cnt_by_date: Dict[str, int], truncated: int):
-    cache_file = cache_path(cache_dir, f"agg_{condition_id}.json")
-    payload = {
-        "vol_by_date": vol_by_date,
-        "cnt_by_date": cnt_by_date,
-        "truncated": int(truncated),
-    }
+def write_agg_cache(db: sqlite3.Connection, condition_id: str, vol_by_date: Dict[str, float], cnt_by_date: Dict[str, int], truncated: int):
     try:
-        cache_file.write_text(json.dumps(payload))
+        db.execute(
+            "INSERT OR REPLACE INTO agg (condition_id, vol, cnt, truncated) VALUES (?, ?, ?, ?)",
+            (condition_id, compress_blob(json_dumps(vol_by_date)), compress_blob(json_dumps(cnt_by_date)), int(truncated)),
+        )
     except Exception:
         pass
 
@@ -118,77 +176,159 @@ def trades_cache_path(cache_dir: Path, condition_id: str) -> Path:
     return cache_path(cache_dir, f"trades_{condition_id}.jsonl")
 
 
-def fetch_all_trades(data_base: str, condition_id: str, timeout: int, limiter: RateLimiter, cache_dir: Path) -> Tuple[List[Dict[str, Any]], int]:
-    # If jsonl cache exists, load it
-    jsonl = trades_cache_path(cache_dir, condition_id)
-    if jsonl.exists():
+def parse_trade_lines(lines: List[bytes]) -> List[Dict[str, Any]]:
+    if _simd_parser is not None:
+        # SIMD tokenizer plus on-demand field access: only the three keys the
+        # aggregation reads are ever materialized into Python objects.
         trades = []
-        with jsonl.open() as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+        for line in lines:
+            if not line:
+                continue
+            try:
+                doc = _simd_parser.parse(line)
+            except Exception:
+                continue
+            t: Dict[str, Any] = {}
+            for key in TRADE_KEYS:
                 try:
-                    trades.append(json.loads(line))
+                    t[key] = doc.at_pointer(f"/{key}")
                 except Exception:
-                    continue
-        return trades, 0
+                    pass
+            trades.append(t)
+        return trades
+
+    try:
+        return [json_loads(line) for line in lines if line]
+    except Exception:
+        # tolerate a truncated trailing line from an interrupted run
+        trades = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                trades.append(json_loads(line))
+            except Exception:
+                continue
+        return trades
+
+
+def scan_trades_cache(cache_dir: Path) -> set:
+    """One scandir pass instead of per-market exists()/ENOENT probes."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return {e.name for e in os.scandir(cache_dir) if e.name.startswith("trades_")}
+
+
+async def fetch_all_trades(session: aiohttp.ClientSession, data_base: str, condition_id: str, timeout: int, limiter: AsyncLimiter, cache_dir: Path, cached_trades: set) -> Tuple[List[Dict[str, Any]], int]:
+    # Cache hits are decided by the startup scan; the reads stay EAFP in case
+    # a file vanished since. Completed fetches are stored compressed; a raw
+    # .jsonl is either from an interrupted run or pre-compression.
+    jsonl = trades_cache_path(cache_dir, condition_id)
+    zst = jsonl.with_name(jsonl.name + ".zst")
+    if zstd is not None and zst.name in cached_trades:
+        try:
+            return parse_trade_lines(_zstd_d.decompress(zst.read_bytes()).splitlines()), 0
+        except FileNotFoundError:
+            pass
+    if jsonl.name in cached_trades:
+        try:
+            return parse_trade_lines(jsonl.read_bytes().splitlines()), 0
+        except FileNotFoundError:
+            pass
 
     trades: List[Dict[str, Any]] = []
     limit = 500
     offset = 0
     truncated = 0
 
-    while True:
-        if offset > 3000:
-            truncated = 1
-            break
-        url = f"{data_base}/trades"
-        params = {"market": condition_id, "limit": limit, "offset": offset}
-        try:
-            batch = request_json("GET", url, params=params, timeout=timeout, limiter=limiter)
-        except Exception as e:
-            msg = str(e)
-            if "max historical activity offset of 3000 exceeded" in msg:
+    # One append-mode handle for the whole pagination loop, opened lazily on
+    # the first non-empty batch: a fetch that fails outright leaves no file
+    # behind for scan_trades_cache to mistake for a complete (empty) cache.
+    # Partial data still survives a crash and we skip per-batch open/close.
+    f = None
+    try:
+        while True:
+            if offset > 3000:
                 truncated = 1
                 break
-            raise
-        if not isinstance(batch, list):
-            batch = []
-        trades.extend(batch)
-        # append to cache as we go
-        if batch:
+            url = f"{data_base}/trades"
+            params = {"market": condition_id, "limit": limit, "offset": offset}
             try:
-                with jsonl.open("a") as f:
-                    for t in batch:
-                        f.write(json.dumps(t) + "\n")
-            except Exception:
-                pass
-        if len(batch) < limit:
-            break
-        offset += limit
+                batch = await request_json(session, "GET", url, params=params, timeout=timeout, limiter=limiter)
+            except Exception as e:
+                msg = str(e)
+                if "max historical activity offset of 3000 exceeded" in msg:
+                    truncated = 1
+                    break
+                raise
+            if not isinstance(batch, list):
+                batch = []
+            trades.extend(batch)
+            # append to cache as we go
+            if batch:
+                if f is None:
+                    f = jsonl.open("ab", buffering=1 << 20)
+                for t in batch:
+                    f.write(json_dumps(t) + b"\n")
+            if len(batch) < limit:
+                break
+            offset += limit
+    finally:
+        if f is not None:
+            f.close()
+
+    # Fetch completed: compress the cache and drop the raw stream file.
+    if zstd is not None and f is not None:
+        try:
+            zst.write_bytes(_zstd_c.compress(jsonl.read_bytes()))
+            jsonl.unlink()
+        except Exception:
+            pass
 
     return trades, truncated
 
 
-def trade_to_date(trade: Dict[str, Any]) -> Optional[str]:
+_day_cache: Dict[int, str] = {}
+
+
+def day_to_date(day: int) -> str:
+    date = _day_cache.get(day)
+    if date is None:
+        date = _day_cache.setdefault(day, time.strftime("%Y-%m-%d", time.gmtime(day * 86400)))
+    return date
+
+
+def trade_to_day(trade: Dict[str, Any]) -> Optional[int]:
     ts = trade.get("timestamp")
     if ts is None:
         return None
     try:
-        ts = int(float(ts))
+        return int(float(ts)) // 86400
     except Exception:
         return None
-    return time.strftime("%Y-%m-%d", time.gmtime(ts))
 
 
-def aggregate_trades(trades: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Dict[str, int]]:
+def aggregate_trades(trades: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Dict[str, int], Optional[str]]:
+    """Aggregate per-day volume/count and the earliest trade date in one pass."""
+    if pd is not None and trades:
+        df = pd.DataFrame(trades, columns=["timestamp", "price", "size"])
+        for col in ("timestamp", "price", "size"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df = df.dropna()
+        if df.empty:
+            return {}, {}, None
+        dates = pd.to_datetime(df["timestamp"].astype("int64"), unit="s", utc=True).dt.strftime("%Y-%m-%d")
+        vol_by_date = (df["price"] * df["size"]).groupby(dates).sum().to_dict()
+        cnt_by_date = dates.groupby(dates).size().to_dict()
+        return vol_by_date, cnt_by_date, dates.min()
+
     vol_by_date: Dict[str, float] = defaultdict(float)
     cnt_by_date: Dict[str, int] = defaultdict(int)
+    min_day: Optional[int] = None
     for t in trades:
-        date = trade_to_date(t)
-        if not date:
+        day = trade_to_day(t)
+        if day is None:
             continue
+        date = day_to_date(day)
         price = t.get("price")
         size = t.get("size")
         try:
@@ -198,16 +338,161 @@ def aggregate_trades(trades: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Di
             continue
         vol_by_date[date] += price * size
         cnt_by_date[date] += 1
-    return dict(vol_by_date), dict(cnt_by_date)
+        if min_day is None or day < min_day:
+            min_day = day
+    min_date = day_to_date(min_day) if min_day is not None else None
+    return dict(vol_by_date), dict(cnt_by_date), min_date
+
+
+def _aggregate_one(item: Tuple[str, str]) -> Tuple[str, Dict[str, float], Dict[str, int]]:
+    condition_id, path = item
+    data = Path(path).read_bytes()
+    if path.endswith(".zst") and zstd is not None:
+        data = _zstd_d.decompress(data)
+    vol_by_date, cnt_by_date, _min_date = aggregate_trades(parse_trade_lines(data.splitlines()))
+    return condition_id, vol_by_date, cnt_by_date
+
+
+def prewarm_agg_cache(db: sqlite3.Connection, cache_dir: Path, market_ids: List[str], cached_trades: set) -> None:
+    """Rebuild missing agg caches from existing trades caches on all cores.
+
+    Aggregation is pure CPU and each condition_id is independent, so markets
+    whose trades are already on disk don't have to wait their turn behind the
+    network loop.
+    """
+    work: List[Tuple[str, str]] = []
+    seen = set()
+    agg_keys = {row[0] for row in db.execute("SELECT condition_id FROM agg")}
+    for mid in market_ids:
+        row = db.execute("SELECT blob FROM gamma WHERE market_id = ?", (mid,)).fetchone()
+        if not row:
+            continue
+        try:
+            gamma = json_loads(decompress_blob(row[0]))
+        except Exception:
+            continue
+        if not gamma or not gamma.get("conditionId"):
+            continue
+        condition_id = str(gamma.get("conditionId"))
+        if condition_id in seen:
+            continue
+        seen.add(condition_id)
+        if condition_id in agg_keys:
+            continue
+        jsonl = trades_cache_path(cache_dir, condition_id)
+        zst = jsonl.with_name(jsonl.name + ".zst")
+        if zst.name in cached_trades:
+            work.append((condition_id, str(zst)))
+        elif jsonl.name in cached_trades:
+            work.append((condition_id, str(jsonl)))
+    if not work:
+        return
+
+    print(f"Rebuilding {len(work)} agg caches from trades caches ...")
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for condition_id, vol_by_date, cnt_by_date in ex.map(_aggregate_one, work):
+            # cached trades always load with truncated=0, same as the warm path
+            write_agg_cache(db, condition_id, vol_by_date, cnt_by_date, 0)
+    db.commit()
+
+
+async def process_market(session: aiohttp.ClientSession, sem: asyncio.Semaphore, args, cache_dir: Path, db: sqlite3.Connection, limiter: AsyncLimiter, cached_trades: set, needed: Dict[str, List[str]], mid: str, stats: Dict[str, int], records: List[List[Any]]) -> None:
+    async with sem:
+        stats["done"] += 1
+        if stats["done"] % 50 == 0:
+            db.commit()
+        print(f"[{stats['done']}/{stats['total']}] {mid}")
+        gamma = None
+        try:
+            gamma = await fetch_gamma_market(session, args.gamma_base, mid, args.timeout, limiter, db)
+        except Exception as e:
+            print(f"  WARNING: gamma fetch failed for {mid}: {e}")
+        if not gamma or not gamma.get("conditionId"):
+            stats["gamma_fail"] += 1
+            records.extend([mid, d, 0.0, 0, 0] for d in needed[mid])
+            return
+
+        condition_id = str(gamma.get("conditionId"))
+
+        # Load cached aggregation if present
+        min_date: Optional[str] = None
+        cached = load_agg_cache(db, condition_id)
+        if cached:
+            vol_by_date, cnt_by_date, truncated = cached
+        else:
+            try:
+                trades, truncated = await fetch_all_trades(session, args.data_base, condition_id, args.timeout, limiter, cache_dir, cached_trades)
+                vol_by_date, cnt_by_date, min_date = aggregate_trades(trades)
+                write_agg_cache(db, condition_id, vol_by_date, cnt_by_date, truncated)
+            except Exception as e:
+                print(f"  WARNING: trades fetch failed for {mid} (condition {condition_id}): {e}")
+                stats["trades_fail"] += 1
+                records.extend([mid, d, 0.0, 0, 0] for d in needed[mid])
+                return
+
+        if truncated:
+            stats["truncated"] += 1
+
+        # needed[mid] is sorted, so one bisect finds the truncation boundary:
+        # everything at or before the earliest fetched trade date is incomplete.
+        dates = needed[mid]
+        cut = bisect.bisect_right(dates, min_date) if (truncated and min_date is not None) else 0
+        records.extend([mid, d, 0.0, 0, 1] for d in dates[:cut])
+        records.extend(
+            [mid, d, float(vol_by_date.get(d, 0.0)), int(cnt_by_date.get(d, 0)), 0]
+            for d in dates[cut:]
+        )
+        stats["ok"] += 1
+
+
+OUT_COLUMNS = ["market_id", "date", "daily_volume", "trade_count", "truncated"]
+
+
+def write_output(out_path: Path, records: List[List[Any]]) -> None:
+    # Tasks finish in arbitrary order; sort by (market_id, date) so the CSV
+    # is reproducible and diffable across runs.
+    records.sort(key=lambda r: (r[0], r[1]))
+    if pd is not None:
+        pd.DataFrame.from_records(records, columns=OUT_COLUMNS).to_csv(out_path, index=False)
+        return
+    with out_path.open("w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(OUT_COLUMNS)
+        writer.writerows(records)
 
 
-def min_trade_date(trades: List[Dict[str, Any]]) -> Optional[str]:
-    dates = []
-    for t in trades:
-        d = trade_to_date(t)
-        if d:
-            dates.append(d)
-    return min(dates) if dates else None
+async def run(args) -> int:
+    daily_path = Path(args.daily)
+    out_path = Path(args.out)
+    cache_dir = Path(args.cache_dir)
+
+    needed = read_needed_dates(daily_path)
+    market_ids = sorted(needed.keys())
+
+    limiter = AsyncLimiter(args.rps, 1)
+    sem = asyncio.Semaphore(args.concurrency)
+    records: List[List[Any]] = []
+    stats = {"total": len(market_ids), "done": 0, "ok": 0, "gamma_fail": 0, "trades_fail": 0, "truncated": 0}
+
+    db = open_cache_db(cache_dir)
+    cached_trades = scan_trades_cache(cache_dir)
+    prewarm_agg_cache(db, cache_dir, market_ids, cached_trades)
+    try:
+        # One pooled, keep-alive session for the whole run: connections to the
+        # gamma/data hosts are reused instead of re-handshaking TLS per request.
+        connector = aiohttp.TCPConnector(limit=max(32, args.concurrency * 2))
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*[
+                process_market(session, sem, args, cache_dir, db, limiter, cached_trades, needed, mid, stats, records)
+                for mid in market_ids
+            ])
+    finally:
+        db.commit()
+        db.close()
+    write_output(out_path, records)
+
+    print(f"Done. markets={stats['total']} ok={stats['ok']} gamma_fail={stats['gamma_fail']} trades_fail={stats['trades_fail']} truncated={stats['truncated']}")
+    return 0
 
 
 def main() -> int:
@@ -218,82 +503,11 @@ def main() -> int:
     parser.add_argument("--data-base", default="https://data-api.polymarket.com")
     parser.add_argument("--rps", type=float, default=5.0)
     parser.add_argument("--timeout", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
     parser.add_argument("--cache-dir", default="cache")
     args = parser.parse_args()
 
-    daily_path = Path(args.daily)
-    out_path = Path(args.out)
-    cache_dir = Path(args.cache_dir)
-
-    needed = read_needed_dates(daily_path)
-    market_ids = sorted(needed.keys())
-    total = len(market_ids)
-
-    limiter = RateLimiter(args.rps)
-
-    ok = 0
-    gamma_fail = 0
-    trades_fail = 0
-    truncated_count = 0
-
-    with out_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["market_id", "date", "daily_volume", "trade_count", "truncated"])
-
-        for i, mid in enumerate(market_ids, start=1):
-            print(f"[{i}/{total}] {mid}")
-            gamma = None
-            try:
-                gamma = fetch_gamma_market(args.gamma_base, mid, args.timeout, limiter, cache_dir)
-            except Exception as e:
-                print(f"  WARNING: gamma fetch failed for {mid}: {e}")
-            if not gamma or not gamma.get("conditionId"):
-                gamma_fail += 1
-                for d in needed[mid]:
-                    writer.writerow([mid, d, 0.0, 0, 0])
-                continue
-
-            condition_id = str(gamma.get("conditionId"))
-
-            # Load cached aggregation if present
-            cached = load_agg_cache(cache_dir, condition_id)
-            if cached:
-                vol_by_date, cnt_by_date, truncated = cached
-            else:
-                try:
-                    trades, truncated = fetch_all_trades(args.data_base, condition_id, args.timeout, limiter, cache_dir)
-                    vol_by_date, cnt_by_date = aggregate_trades(trades)
-                    write_agg_cache(cache_dir, condition_id, vol_by_date, cnt_by_date, truncated)
-                except Exception as e:
-                    print(f"  WARNING: trades fetch failed for {mid} (condition {condition_id}): {e}")
-                    trades_fail += 1
-                    for d in needed[mid]:
-                        writer.writerow([mid, d, 0.0, 0, 0])
-                    continue
-
-            if truncated:
-                truncated_count += 1
-
-            # If truncated, mark dates earlier than the earliest fetched trade as truncated=1
-            min_date = None
-            if truncated:
-                min_date = min_trade_date(trades) if 'trades' in locals() else None
-
-            for d in needed[mid]:
-                is_trunc = 0
-                if truncated and min_date is not None and d <= min_date:
-                    is_trunc = 1
-                writer.writerow([
-                    mid,
-                    d,
-                    0.0 if is_trunc else float(vol_by_date.get(d, 0.0)),
-                    0 if is_trunc else int(cnt_by_date.get(d, 0)),
-                    int(is_trunc),
-                ])
-            ok += 1
-
-    print(f"Done. markets={total} ok={ok} gamma_fail={gamma_fail} trades_fail={trades_fail} truncated={truncated_count}")
-    return 0
+    return asyncio.run(run(args))
 
 
 if __name__ == "__main__":
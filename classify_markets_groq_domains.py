@@ -1,18 +1,178 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import csv
 import json
 import os
-import time
+import re
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple, List
 
-import requests
+import aiohttp
+from aiolimiter import AsyncLimiter
 
 DEFAULT_GROQ_API_BASE = "https://api.groq.com/openai/v1"
 DEFAULT_GROQ_MODEL = "llama-3.3-70b-versatile"
 USER_AGENT = "market-classifier/1.0"
 
+# Built once: byte-identical across requests so the provider can cache the prefix.
+SYSTEM_TEXT = (
+    "You are a strict information-extraction engine.\n\n"
+    "Input: a numbered list of Polymarket markets, each with a TITLE and DESCRIPTION.\n\n"
+    'Output: JSON ONLY of the form {"results": [...]}, with exactly one object per numbered input, in order.\n'
+    "Each object has exactly these keys:\n"
+    '  {"type": "1"|"2"|"U", "domain": "finance"|"sports"|"politics"|"misc", "date": "DD/MM/YYYY"|"", "reason": ""}\n\n'
+    "Rules for TYPE (must follow exactly):\n"
+    "1) First, locate all explicit time expressions in the text (dates, months+year, year-only, quarters, relative deadlines, ranges).\n"
+    "2) If there is NO explicit date/deadline anywhere in title/description, then:\n"
+    '     type="U" and date="".\n'
+    "3) Otherwise determine whether the resolution day is known in advance as a SINGLE calendar date:\n"
+    '   - Type="1" ONLY if the market explicitly states (or unambiguously implies) a single specific calendar date '
+    '(e.g., "on 05 Nov 2026", "November 5, 2026", "2026-11-05") AND there are no range/deadline markers.\n'
+    '   - Type="2" if the market can resolve over a range of dates OR on a single date not knowable in advance. This includes ANY of:\n'
+    '       * "by", "before", "until", "through", "between X and Y", "from X to Y"\n'
+    '       * "within N days", "in the next N days", "at any point"\n'
+    '       * "one day after / N days after / after launch / after listing" (unknown trigger date)\n'
+    '       * "in 2026", "in 2027", "this year", quarters like "Q1 2026" (not a single day)\n'
+    '   - If the text contains both a fixed single-day event date AND a range/deadline clause, treat it as Type="2".\n\n'
+    "Rules for DATE:\n"
+    '- If type="U": date="".\n'
+    '- If type="1": date must be the single calendar date (DD/MM/YYYY) found in the text.\n'
+    '- If type="2": date must be the deadline/end of the stated range:\n'
+    '    * "by <date>" => that date\n'
+    '    * "before <date>" => that date (deadline)\n'
+    '    * "until <date>" => that date\n'
+    '    * "between <start> and <end>" => use <end>\n'
+    '    * "from <start> to <end>" => use <end>\n'
+    '    * "end of month <Month YYYY>" => last day of that month\n'
+    '    * "end of year <YYYY>" or "in <YYYY>" or "during <YYYY>" => 31/12/YYYY\n'
+    '    * Quarter: "Q1 YYYY" => 31/03/YYYY, "Q2" => 30/06, "Q3" => 30/09, "Q4" => 31/12\n'
+    '    * If only a month+year is given (e.g., "by July 2026"), interpret as last day of that month.\n'
+    "- Never use any dataset fields or external knowledge. Use title/description only.\n\n"
+    "Rules for DOMAIN:\n"
+    "- finance: crypto, token, FDV, price targets, ETFs, stocks, rates, inflation, CPI, earnings, macro, commodities.\n"
+    "- sports: leagues/teams/matches/tournaments/athletes/scoring.\n"
+    "- politics: elections, candidates, parties, governments, legislation, wars/diplomacy when framed as political outcomes.\n"
+    "- misc: everything else.\n"
+    "Choose ONE domain only.\n\n"
+    "Formatting constraints:\n"
+    "- Output must be valid JSON (double quotes, no trailing commas).\n"
+    '- date must be exactly DD/MM/YYYY or "".\n'
+    "- reason must be a very short string (<= 120 chars) describing what time expression you used; do NOT include extra keys.\n"
+)
+
+
+# ---------------- Rule-based pre-classifier ----------------
+# Mirrors the system prompt's rules for the unambiguous cases so a compiled
+# regex pass can answer them without an LLM call; anything uncertain falls
+# through to Groq.
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+MONTH_DAY_YEAR_RE = re.compile(rf"\b({_MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b", re.I)
+DAY_MONTH_YEAR_RE = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_NAMES})\.?,?\s+(\d{{4}})\b", re.I)
+QUARTER_RE = re.compile(r"\bq([1-4])\s*(\d{4})\b", re.I)
+# unambiguous "deadline" markers: a single date plus one of these is type 2
+DEADLINE_RE = re.compile(r"\b(?:by|before|until|through)\b", re.I)
+# range/relative markers whose end date the regexes can't resolve on their own
+RANGEISH_RE = re.compile(r"\b(?:between|from|within|during|end\s+of|after|at\s+any\s+point|in\s+the\s+next)\b", re.I)
+# any other time expression (year, month name, relative deadline) the regexes
+# above can't pin to a single day => let the LLM decide
+TIMEISH_RE = re.compile(rf"\b(?:(?:19|20)\d{{2}}|{_MONTH_NAMES}|this year|next year|today|tomorrow|week|month|year|quarter|day|days|hours)\b", re.I)
+
+QUARTER_END = {1: (31, 3), 2: (30, 6), 3: (30, 9), 4: (31, 12)}
+
+DOMAIN_KEYWORDS = {
+    "finance": {
+        "bitcoin", "btc", "ethereum", "eth", "solana", "sol", "xrp", "doge", "dogecoin", "crypto",
+        "token", "coin", "fdv", "etf", "stock", "stocks", "shares", "nasdaq", "ipo", "earnings",
+        "fed", "fomc", "rate", "rates", "inflation", "cpi", "gdp", "recession", "treasury",
+        "gold", "oil", "commodity", "price", "fdv", "airdrop",
+    },
+    "sports": {
+        "nba", "nfl", "mlb", "nhl", "ufc", "mma", "fifa", "uefa", "f1", "nascar", "atp", "wta",
+        "league", "match", "game", "season", "playoffs", "championship", "tournament", "cup",
+        "bowl", "finals", "olympics", "medal", "goals", "touchdown",
+        "knockout", "slam", "wimbledon", "draft",
+    },
+    "politics": {
+        "election", "elections", "president", "presidential", "senate", "congress", "governor",
+        "parliament", "minister", "party", "vote", "ballot", "primary", "nominee", "candidate",
+        "impeachment", "cabinet", "legislation", "bill", "veto", "ceasefire", "war", "nato",
+        "sanctions", "tariff", "tariffs", "treaty", "coup",
+    },
+}
+
+
+def _found_dates(text: str) -> List[Optional[str]]:
+    """All explicit single calendar dates in the text, as DD/MM/YYYY (None if invalid)."""
+    found = []
+    for y, m, d in ISO_DATE_RE.findall(text):
+        found.append((int(d), int(m), int(y)))
+    for name, d, y in MONTH_DAY_YEAR_RE.findall(text):
+        found.append((int(d), MONTHS[name.lower()], int(y)))
+    for d, name, y in DAY_MONTH_YEAR_RE.findall(text):
+        found.append((int(d), MONTHS[name.lower()], int(y)))
+    out = []
+    for d, m, y in dict.fromkeys(found):
+        try:
+            datetime(y, m, d)
+            out.append(f"{d:02d}/{m:02d}/{y:04d}")
+        except ValueError:
+            out.append(None)
+    return out
+
+
+def _keyword_domain(text: str) -> Optional[str]:
+    words = set(re.findall(r"[a-z0-9&]+", text.lower()))
+    scores = {domain: len(words & keywords) for domain, keywords in DOMAIN_KEYWORDS.items()}
+    best = max(scores.values())
+    if best == 0:
+        return None
+    top = [domain for domain, score in scores.items() if score == best]
+    return top[0] if len(top) == 1 else None
+
+
+def classify_with_rules(title: str, description: str) -> Optional[Dict[str, str]]:
+    """Classify deterministically when the text is unambiguous, else None."""
+    text = f"{title} {description}"
+    domain = _keyword_domain(text)
+    if domain is None:
+        return None
+
+    dates = _found_dates(text)
+    if None in dates:
+        return None
+    quarters = QUARTER_RE.findall(text)
+    has_deadline = bool(DEADLINE_RE.search(text))
+    has_rangeish = bool(RANGEISH_RE.search(text))
+
+    if not dates and not quarters:
+        if has_deadline or has_rangeish or TIMEISH_RE.search(text):
+            return None
+        return {"type": "U", "domain": domain, "date": "", "status": "ok", "error": ""}
+
+    if len(dates) == 1 and not quarters:
+        if has_deadline:
+            return {"type": "2", "domain": domain, "date": dates[0], "status": "ok", "error": ""}
+        if has_rangeish:
+            return None
+        return {"type": "1", "domain": domain, "date": dates[0], "status": "ok", "error": ""}
+
+    if not dates and len(quarters) == 1 and not has_rangeish:
+        q, y = int(quarters[0][0]), int(quarters[0][1])
+        day, month = QUARTER_END[q]
+        return {"type": "2", "domain": domain, "date": f"{day:02d}/{month:02d}/{y:04d}", "status": "ok", "error": ""}
+
+    return None
+
 
 def is_ddmmyyyy(s: str) -> bool:
     try:
@@ -31,21 +191,16 @@ def parse_ts(val: Any) -> Optional[int]:
         return None
 
 
-def _request_once(method: str, url: str, *, headers=None, json_body=None, timeout=60) -> Any:
-    if method == "POST":
-        resp = requests.post(url, json=json_body, headers=headers, timeout=timeout)
-    else:
-        resp = requests.get(url, headers=headers, timeout=timeout)
+async def _request_once(session: aiohttp.ClientSession, method: str, url: str, *, headers=None, json_body=None, timeout=60) -> Any:
+    async with session.request(method, url, json=json_body, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        text = await resp.text()
+        if resp.status < 400:
+            return json.loads(text) if text else None
+        raise RuntimeError(f"HTTP {resp.status}: {text[:500]}")
 
-    if resp.status_code < 400:
-        return resp.json() if resp.text else None
 
-    raise RuntimeError(f"HTTP {resp.status_code}: {resp.text[:500]}")
-
-
-def parse_response(text: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+def parse_item(data: Any) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     try:
-        data = json.loads(text)
         t = str(data.get("type", "")).strip()
         d = str(data.get("domain", "")).strip()
         date_str = str(data.get("date", "")).strip()
@@ -64,114 +219,183 @@ def parse_response(text: str) -> Tuple[Optional[str], Optional[str], Optional[st
         return None, None, None
 
 
-def classify_market(api_base: str, api_key: str, model: str, title: str, description: str, max_attempts: int) -> Dict[str, str]:
-    system_text = (
-        "You are a strict information-extraction engine.\n\n"
-        "Input: the TITLE and DESCRIPTION of a Polymarket market.\n\n"
-        "Output: JSON ONLY with exactly these keys:\n"
-        '  {"type": "1"|"2"|"U", "domain": "finance"|"sports"|"politics"|"misc", "date": "DD/MM/YYYY"|"", "reason": ""}\n\n'
-        "Rules for TYPE (must follow exactly):\n"
-        "1) First, locate all explicit time expressions in the text (dates, months+year, year-only, quarters, relative deadlines, ranges).\n"
-        "2) If there is NO explicit date/deadline anywhere in title/description, then:\n"
-        '     type="U" and date="".\n'
-        "3) Otherwise determine whether the resolution day is known in advance as a SINGLE calendar date:\n"
-        '   - Type="1" ONLY if the market explicitly states (or unambiguously implies) a single specific calendar date '
-        '(e.g., "on 05 Nov 2026", "November 5, 2026", "2026-11-05") AND there are no range/deadline markers.\n'
-        '   - Type="2" if the market can resolve over a range of dates OR on a single date not knowable in advance. This includes ANY of:\n'
-        '       * "by", "before", "until", "through", "between X and Y", "from X to Y"\n'
-        '       * "within N days", "in the next N days", "at any point"\n'
-        '       * "one day after / N days after / after launch / after listing" (unknown trigger date)\n'
-        '       * "in 2026", "in 2027", "this year", quarters like "Q1 2026" (not a single day)\n'
-        '   - If the text contains both a fixed single-day event date AND a range/deadline clause, treat it as Type="2".\n\n'
-        "Rules for DATE:\n"
-        '- If type="U": date="".\n'
-        '- If type="1": date must be the single calendar date (DD/MM/YYYY) found in the text.\n'
-        '- If type="2": date must be the deadline/end of the stated range:\n'
-        '    * "by <date>" => that date\n'
-        '    * "before <date>" => that date (deadline)\n'
-        '    * "until <date>" => that date\n'
-        '    * "between <start> and <end>" => use <end>\n'
-        '    * "from <start> to <end>" => use <end>\n'
-        '    * "end of month <Month YYYY>" => last day of that month\n'
-        '    * "end of year <YYYY>" or "in <YYYY>" or "during <YYYY>" => 31/12/YYYY\n'
-        '    * Quarter: "Q1 YYYY" => 31/03/YYYY, "Q2" => 30/06, "Q3" => 30/09, "Q4" => 31/12\n'
-        '    * If only a month+year is given (e.g., "by July 2026"), interpret as last day of that month.\n'
-        "- Never use any dataset fields or external knowledge. Use title/description only.\n\n"
-        "Rules for DOMAIN:\n"
-        "- finance: crypto, token, FDV, price targets, ETFs, stocks, rates, inflation, CPI, earnings, macro, commodities.\n"
-        "- sports: leagues/teams/matches/tournaments/athletes/scoring.\n"
-        "- politics: elections, candidates, parties, governments, legislation, wars/diplomacy when framed as political outcomes.\n"
-        "- misc: everything else.\n"
-        "Choose ONE domain only.\n\n"
-        "Formatting constraints:\n"
-        "- Output must be valid JSON (double quotes, no trailing commas).\n"
-        '- date must be exactly DD/MM/YYYY or "".\n'
-        "- reason must be a very short string (<= 120 chars) describing what time expression you used; do NOT include extra keys.\n"
-    )
-    user_text = f"Title: {title}\nDescription: {description}\n"
+def parse_batch_response(text: str, expected: int) -> Optional[List[Tuple[Optional[str], Optional[str], Optional[str]]]]:
+    try:
+        data = json.loads(text)
+        results = data.get("results")
+        if not isinstance(results, list) or len(results) != expected:
+            return None
+        return [parse_item(item) for item in results]
+    except Exception:
+        return None
 
-    url = f"{api_base}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "User-Agent": USER_AGENT,
-    }
+
+async def classify_market_batch(session: aiohttp.ClientSession, limiter: AsyncLimiter, url: str, headers: Dict[str, str], model: str, items: List[Tuple[str, str]], max_attempts: int) -> List[Dict[str, str]]:
+    user_text = "".join(
+        f"[{i}] Title: {title}\nDescription: {description}\n\n"
+        for i, (title, description) in enumerate(items, start=1)
+    )
 
     for attempt in range(1, max_attempts + 1):
         payload = {
             "model": model,
             "messages": [
-                {"role": "system", "content": system_text},
+                {"role": "system", "content": SYSTEM_TEXT},
                 {"role": "user", "content": user_text},
             ],
             "temperature": 0,
-            "max_tokens": 64,
+            "max_tokens": 64 * len(items),
             "response_format": {"type": "json_object"}
         }
-        resp = _request_once("POST", url, headers=headers, json_body=payload, timeout=60)
+        await limiter.acquire()
+        resp = await _request_once(session, "POST", url, headers=headers, json_body=payload, timeout=60)
         text = ""
         try:
             text = resp["choices"][0]["message"]["content"].strip()
         except Exception:
             text = ""
 
-        t, d, date_str = parse_response(text)
-        if t and d and date_str is not None:
-            return {"type": t, "domain": d, "date": date_str, "status": "ok", "error": ""}
+        parsed = parse_batch_response(text, len(items))
+        if parsed is not None:
+            results = []
+            for t, d, date_str in parsed:
+                if t and d and date_str is not None:
+                    results.append({"type": t, "domain": d, "date": date_str, "status": "ok", "error": ""})
+                else:
+                    results.append({"type": "", "domain": "", "date": "", "status": "error", "error": "invalid_response"})
+            return results
 
         if attempt < max_attempts:
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             continue
 
-    return {"type": "", "domain": "", "date": "", "status": "error", "error": "invalid_response"}
+    return [{"type": "", "domain": "", "date": "", "status": "error", "error": "invalid_response"} for _ in items]
 
 
 def load_market_texts(texts_path: str) -> Dict[str, Dict[str, str]]:
     texts = {}
     with open(texts_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return texts
+        slug_idx = header.index("slug")
+        title_idx = header.index("title")
+        desc_idx = header.index("description")
+        # plain csv.reader avoids a fresh dict per row
         for row in reader:
-            slug = row.get("slug", "")
+            slug = row[slug_idx]
             if not slug:
                 continue
             texts[slug] = {
-                "title": row.get("title", ""),
-                "description": row.get("description", ""),
+                "title": row[title_idx],
+                "description": row[desc_idx],
             }
     return texts
 
 
 def load_slugs_from_daily(daily_path: str) -> List[str]:
-    slugs = []
     with open(daily_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            slug = row.get("slug", "")
-            if slug and slug not in slugs:
-                slugs.append(slug)
-    return slugs
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return []
+        slug_idx = header.index("slug")
+        # dict preserves insertion order, so this dedups in O(n)
+        return list(dict.fromkeys(row[slug_idx] for row in reader if row[slug_idx]))
+
+
+
 
+async def classify_batch_task(session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: AsyncLimiter, url: str, headers: Dict[str, str], args, texts: Dict[str, Dict[str, str]], batch_slugs: List[str], stats: Dict[str, int], queue: "asyncio.Queue") -> None:
+    async with sem:
+        items = [(texts[s]["title"], texts[s]["description"]) for s in batch_slugs]
+        try:
+            results = await classify_market_batch(session, limiter, url, headers, args.groq_model, items, args.max_attempts)
+        except Exception as e:
+            print(f"ERROR for batch starting at {batch_slugs[0]}: {e}")
+            results = [{"type": "", "domain": "", "date": "", "status": "error", "error": "request_failed"} for _ in batch_slugs]
+
+        rows = []
+        batch_failed = False
+        for slug, result in zip(batch_slugs, results):
+            status = result.get("status", "error")
+            error = result.get("error", "")
+            if status == "error" or error == "request_failed":
+                batch_failed = True
+            rows.append([slug, result.get("type", ""), result.get("domain", ""), result.get("date", ""), status, error])
+        await queue.put(rows)
+        stats["done"] += len(batch_slugs)
+        print(f"Completed {stats['done']}/{stats['total']} — through {batch_slugs[-1]}")
+        if batch_failed:
+            await asyncio.sleep(args.failure_delay)
+
+
+async def csv_writer_task(out_path: str, queue: "asyncio.Queue") -> None:
+    # Single consumer so each batch's rows land as one ordered, atomic block.
+    # Flush every ~50 rows rather than per batch: the flush only bounds how
+    # much a crash can lose, and per-row syscalls throttle slow filesystems.
+    with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(["slug", "type", "domain", "occurrence_or_deadline_ddmmyyyy", "status", "error"])
+        unflushed = 0
+        while True:
+            rows = await queue.get()
+            if rows is None:
+                break
+            writer.writerows(rows)
+            unflushed += len(rows)
+            if unflushed >= 50:
+                f.flush()
+                unflushed = 0
+
+
+async def run(args) -> int:
+    texts = load_market_texts(args.texts)
+    slugs = load_slugs_from_daily(args.daily)
+    slugs = [s for s in slugs if s in texts]
+    total = len(slugs)
+
+    # Answer the unambiguous markets with the regex rules; only the rest pay
+    # for an LLM call.
+    rule_rows = []
+    remaining = []
+    for slug in slugs:
+        result = classify_with_rules(texts[slug]["title"], texts[slug]["description"])
+        if result:
+            rule_rows.append([slug, result["type"], result["domain"], result["date"], "ok", ""])
+        else:
+            remaining.append(slug)
+    print(f"Rule-classified {len(rule_rows)}/{total} markets without LLM calls")
+
+    sem = asyncio.Semaphore(args.concurrency)
+    limiter = AsyncLimiter(args.rpm, 60)
+    url = f"{args.groq_api_base}/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {args.groq_api_key}",
+        "Content-Type": "application/json",
+        "User-Agent": USER_AGENT,
+    }
+    queue: asyncio.Queue = asyncio.Queue()
+    stats = {"total": total, "done": len(rule_rows)}
+
+    batches = [remaining[start:start + args.batch_size] for start in range(0, len(remaining), args.batch_size)]
+    writer = asyncio.create_task(csv_writer_task(args.out, queue))
+    if rule_rows:
+        await queue.put(rule_rows)
+    # One pooled, keep-alive session so every Groq call reuses the same
+    # TLS connections instead of re-handshaking per request.
+    connector = aiohttp.TCPConnector(limit=max(32, args.concurrency * 2))
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*[
+            classify_batch_task(session, sem, limiter, url, headers, args, texts, batch, stats, queue)
+            for batch in batches
+        ])
+    await queue.put(None)
+    await writer
 
+    print(f"Wrote {args.out}")
+    return 0
 
 
 def main() -> int:
@@ -183,7 +407,9 @@ def main() -> int:
     parser.add_argument("--groq-api-base", default=os.getenv("GROQ_API_BASE", DEFAULT_GROQ_API_BASE))
     parser.add_argument("--groq-model", default=os.getenv("GROQ_MODEL", DEFAULT_GROQ_MODEL))
     parser.add_argument("--max-attempts", type=int, default=1)
-    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rpm", type=float, default=30.0)
     parser.add_argument("--failure-delay", type=float, default=2.0)
     args = parser.parse_args()
 
@@ -191,39 +417,7 @@ def main() -> int:
         print("ERROR: GROQ_API_KEY is required.")
         return 2
 
-    texts = load_market_texts(args.texts)
-    slugs = load_slugs_from_daily(args.daily)
-    slugs = [s for s in slugs if s in texts]
-    total = len(slugs)
-    with open(args.out, "w", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["slug", "type", "domain", "occurrence_or_deadline_ddmmyyyy", "status", "error"])
-        f.flush()
-
-        for idx, slug in enumerate(slugs, start=1):
-            title = texts[slug]["title"]
-            desc = texts[slug]["description"]
-            try:
-                result = classify_market(args.groq_api_base, args.groq_api_key, args.groq_model, title, desc, args.max_attempts)
-            except Exception as e:
-                print(f"ERROR for {slug}: {e}")
-                result = {"type": "", "domain": "", "date": "", "status": "error", "error": "request_failed"}
-
-            t = result.get("type", "")
-            d = result.get("domain", "")
-            date_str = result.get("date", "")
-            status = result.get("status", "error")
-            error = result.get("error", "")
-
-            writer.writerow([slug, t, d, date_str, status, error])
-            f.flush()
-            print(f"Completed {idx}/{total} — {slug}")
-            time.sleep(args.delay)
-            if status == "error" or error == "request_failed":
-                time.sleep(args.failure_delay)
-
-    print(f"Wrote {args.out}")
-    return 0
+    return asyncio.run(run(args))
 
 
 if __name__ == "__main__":
@@ -13,39 +13,90 @@ Outputs in --out:
 - market_texts.csv           (one row per market: title + description)
 
 Requirements:
-  pip install requests
+  pip install aiohttp
 
 Notes:
 - No The Graph / Polygraph dependency in this version.
 """
 
 import argparse
+import asyncio
+import csv
 import datetime as dt
+import functools
 import json
 import os
+import sqlite3
 import sys
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-import requests
+import aiohttp
+
+try:
+    import orjson
+
+    def json_loads(data: Any) -> Any:
+        return orjson.loads(data)
+
+    def json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def json_loads(data: Any) -> Any:
+        return json.loads(data)
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
 
 DEFAULT_GAMMA_BASE = "https://gamma-api.polymarket.com"
 DEFAULT_CLOB_BASE = "https://clob.polymarket.com"
 
 USER_AGENT = "polymarket-downloader/1.0"
 
+# Gamma pages can change (new markets close); price history of a closed
+# market cannot, so only the Gamma cache carries a TTL.
+GAMMA_CACHE_TTL = 600  # seconds
+
+# One-pass sanitizers for free-text fields headed to CSV. market_texts.csv
+# strips commas too (its consumers expect comma-free fields); daily.csv only
+# flattens newlines, since csv.writer quotes commas properly.
+TRANS = str.maketrans({"\n": " ", "\r": " ", ",": " "})
+NEWLINE_TRANS = str.maketrans({"\n": " ", "\r": " "})
+
+
+def open_cache_db(out_dir: str) -> sqlite3.Connection:
+    db = sqlite3.connect(os.path.join(out_dir, "cache.db"))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("CREATE TABLE IF NOT EXISTS prices (key TEXT PRIMARY KEY, history TEXT)")
+    db.execute("CREATE TABLE IF NOT EXISTS gamma_pages (key TEXT PRIMARY KEY, fetched_at INT, body TEXT)")
+    db.execute("CREATE TABLE IF NOT EXISTS window_days (token_id TEXT PRIMARY KEY, days INT)")
+    return db
+
 
 class RateLimiter:
-    def __init__(self, rps: float):
-        self.min_interval = 1.0 / max(rps, 0.1)
+    """Token bucket: refills at `rps` tokens/sec up to `burst` capacity, so
+    concurrent fetches can spend saved-up allowance in a burst while the
+    long-run rate stays at `rps`."""
+
+    def __init__(self, rps: float, burst: float = 1.0):
+        self.refill_rate = max(rps, 0.1)
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
         self._last = 0.0
+        self._lock = asyncio.Lock()
 
-    def wait(self) -> None:
-        now = time.time()
-        sleep_for = self.min_interval - (now - self._last)
-        if sleep_for > 0:
-            time.sleep(sleep_for)
-        self._last = time.time()
+    async def wait(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.refill_rate)
+            self._last = now
+            if self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.refill_rate)
+                self._last = loop.time()
+                self.tokens = 1.0
+            self.tokens -= 1.0
 
 
 def iso_to_ts(s: Optional[Any]) -> Optional[int]:
@@ -80,9 +131,9 @@ def parse_clob_token_ids(raw: Any) -> List[str]:
         return []
     if isinstance(raw, list):
         return [str(x) for x in raw]
-    if isinstance(raw, str):
+    if isinstance(raw, (bytes, str)):
         try:
-            data = json.loads(raw)
+            data = json_loads(raw)
             if isinstance(data, list):
                 return [str(x) for x in data]
         except Exception:
@@ -90,22 +141,22 @@ def parse_clob_token_ids(raw: Any) -> List[str]:
     return []
 
 
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=4096)
 def ts_to_utc_date(ts: int) -> str:
-    return dt.datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d")
+    return dt.date.fromordinal(_EPOCH_ORDINAL + ts // 86400).isoformat()
 
 
 def utc_date_range(start_ts: int, end_ts: int) -> List[str]:
-    start_date = dt.datetime.utcfromtimestamp(start_ts).date()
-    end_date = dt.datetime.utcfromtimestamp(end_ts).date()
-    out: List[str] = []
-    cur = start_date
-    while cur <= end_date:
-        out.append(cur.strftime("%Y-%m-%d"))
-        cur += dt.timedelta(days=1)
-    return out
+    d0 = _EPOCH_ORDINAL + start_ts // 86400
+    d1 = _EPOCH_ORDINAL + end_ts // 86400
+    return [dt.date.fromordinal(o).isoformat() for o in range(d0, d1 + 1)]
 
 
-def _request_with_retry(
+async def _request_with_retry(
+    session: aiohttp.ClientSession,
     method: str,
     url: str,
     *,
@@ -117,51 +168,54 @@ def _request_with_retry(
     headers = {"User-Agent": USER_AGENT, **(headers or {})}
     backoff = 1.0
     for _attempt in range(6):
-        if method == "GET":
-            resp = requests.get(url, params=params, headers=headers, timeout=timeout)
-        else:
-            resp = requests.post(url, params=params, json=json_body, headers=headers, timeout=timeout)
-
-        if resp.status_code < 400:
-            if resp.text:
-                return resp.json()
-            return None
-
-        if resp.status_code in (429, 500, 502, 503, 504):
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 16)
-            continue
+        async with session.request(
+            method, url, params=params, json=json_body, headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
+            text = await resp.text()
+            if resp.status < 400:
+                if text:
+                    return json_loads(text)
+                return None
+
+            if resp.status in (429, 500, 502, 503, 504):
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 16)
+                continue
 
-        raise RuntimeError(f"{method} {resp.url} failed: {resp.status_code} {resp.text[:300]}")
+            raise RuntimeError(f"{method} {resp.url} failed: {resp.status} {text[:300]}")
 
     raise RuntimeError(f"{method} {url} failed after retries")
 
 
-def http_get(url: str, params: Optional[Dict[str, Any]] = None, timeout: int = 30) -> Any:
-    return _request_with_retry("GET", url, params=params, timeout=timeout)
+async def http_get(session: aiohttp.ClientSession, url: str, params: Optional[Dict[str, Any]] = None, timeout: int = 30) -> Any:
+    return await _request_with_retry(session, "GET", url, params=params, timeout=timeout)
 
 
-def http_post(
+async def http_post(
+    session: aiohttp.ClientSession,
     url: str,
     params: Optional[Dict[str, Any]],
     json_body: Dict[str, Any],
     timeout: int = 30,
     headers: Optional[Dict[str, str]] = None,
 ) -> Any:
-    return _request_with_retry("POST", url, params=params, json_body=json_body, timeout=timeout, headers=headers)
+    return await _request_with_retry(session, "POST", url, params=params, json_body=json_body, timeout=timeout, headers=headers)
 
 
-def fetch_markets(
+async def fetch_markets(
+    session: aiohttp.ClientSession,
     gamma_base: str,
     limit: int,
-    max_markets: Optional[int],
     rate: RateLimiter,
     *,
     order: Optional[str] = None,
     ascending: Optional[bool] = None,
     end_date_min: Optional[str] = None,
-) -> List[Dict[str, Any]]:
-    markets: List[Dict[str, Any]] = []
+    db: Optional[sqlite3.Connection] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yields markets page by page so filtering overlaps with Gamma I/O."""
+    end_date_min_ts = iso_to_ts(end_date_min) if end_date_min else None
     offset = 0
     while True:
         params: Dict[str, Any] = {"closed": "true", "limit": limit, "offset": offset}
@@ -172,55 +226,91 @@ def fetch_markets(
         if end_date_min:
             params["end_date_min"] = end_date_min
 
-        rate.wait()
-        batch = http_get(f"{gamma_base}/markets", params=params)
+        batch = None
+        cache_key = f"{limit}:{offset}:{order}:{ascending}:{end_date_min}"
+        if db is not None:
+            row = db.execute(
+                "SELECT fetched_at, body FROM gamma_pages WHERE key = ?", (cache_key,)
+            ).fetchone()
+            if row is not None and time.time() - row[0] < GAMMA_CACHE_TTL:
+                batch = json_loads(row[1])
+
+        if batch is None:
+            await rate.wait()
+            batch = await http_get(session, f"{gamma_base}/markets", params=params)
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO gamma_pages (key, fetched_at, body) VALUES (?, ?, ?)",
+                    (cache_key, int(time.time()), json_dumps(batch)),
+                )
+                db.commit()
+
         if not batch:
-            break
+            return
 
-        markets.extend(batch)
+        for m in batch:
+            yield m
         offset += limit
 
-        if max_markets and len(markets) >= max_markets:
-            markets = markets[:max_markets]
-            break
-
-    return markets
+        # Walking endDate descending: once a page ends before the cutoff,
+        # every later page does too.
+        if end_date_min_ts and order == "endDate" and ascending is False:
+            last_end = iso_to_ts(batch[-1].get("endDate"))
+            if last_end is not None and last_end < end_date_min_ts:
+                return
 
 
 def parse_outcomes(outcomes_raw: Any, prices_raw: Any) -> Tuple[List[str], List[float]]:
-    if isinstance(outcomes_raw, str):
-        outcomes = json.loads(outcomes_raw)
+    if isinstance(outcomes_raw, (bytes, str)):
+        outcomes = json_loads(outcomes_raw)
     else:
         outcomes = outcomes_raw
-    if isinstance(prices_raw, str):
-        prices = [float(x) for x in json.loads(prices_raw)]
+    if isinstance(prices_raw, (bytes, str)):
+        prices = [float(x) for x in json_loads(prices_raw)]
     else:
         prices = [float(x) for x in prices_raw]
     return outcomes, prices
 
 
 def is_yes_no_market(m: Dict[str, Any]) -> bool:
+    """On success, stashes the parsed fields as m["_outcomes"] / m["_prices"]
+    so downstream consumers never re-parse the JSON strings."""
     try:
-        outcomes, _ = parse_outcomes(m.get("outcomes"), m.get("outcomePrices", []))
+        outcomes, prices = parse_outcomes(m.get("outcomes"), m.get("outcomePrices", []))
     except Exception:
         return False
     if len(outcomes) != 2:
         return False
     normalized = [o.strip().lower() for o in outcomes]
-    return normalized == ["yes", "no"] or normalized == ["no", "yes"]
+    if normalized != ["yes", "no"] and normalized != ["no", "yes"]:
+        return False
+    m["_outcomes"] = outcomes
+    m["_prices"] = prices
+    return True
+
+
+def parse_all_times(m: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Parses every ISO time field once and caches the result as m["_t"]."""
+    t = m.get("_t")
+    if t is None:
+        t = m["_t"] = {
+            "start": iso_to_ts(m.get("startDate")) or iso_to_ts(m.get("createdAt")),
+            "end_date": iso_to_ts(m.get("endDate")),
+            "closed": iso_to_ts(m.get("closedTime")),
+            "updated": iso_to_ts(m.get("updatedAt")),
+        }
+    return t
 
 
 def extract_times(m: Dict[str, Any]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
-    start_ts = iso_to_ts(m.get("startDate")) or iso_to_ts(m.get("createdAt"))
-    end_date_ts = iso_to_ts(m.get("endDate"))
-    closed_ts = iso_to_ts(m.get("closedTime"))
-    return start_ts, end_date_ts, closed_ts
+    t = parse_all_times(m)
+    return t["start"], t["end_date"], t["closed"]
 
 
 def effective_end_ts(m: Dict[str, Any]) -> Optional[int]:
     # Use same idea as your original: closedTime OR endDate OR updatedAt
-    _start, end_date_ts, closed_ts = extract_times(m)
-    return closed_ts or end_date_ts or iso_to_ts(m.get("updatedAt"))
+    t = parse_all_times(m)
+    return t["closed"] or t["end_date"] or t["updated"]
 
 
 def infer_resolution_proxy(m: Dict[str, Any]) -> str:
@@ -228,10 +318,13 @@ def infer_resolution_proxy(m: Dict[str, Any]) -> str:
     Proxy: if final outcomePrices are extremely close to 0/1.
     Returns "YES", "NO", or "".
     """
-    try:
-        outcomes, prices = parse_outcomes(m.get("outcomes"), m.get("outcomePrices", []))
-    except Exception:
-        return ""
+    outcomes = m.get("_outcomes")
+    prices = m.get("_prices")
+    if outcomes is None or prices is None:
+        try:
+            outcomes, prices = parse_outcomes(m.get("outcomes"), m.get("outcomePrices", []))
+        except Exception:
+            return ""
     if len(outcomes) != 2 or len(prices) != 2:
         return ""
     norm = [o.strip().lower() for o in outcomes]
@@ -248,53 +341,131 @@ def infer_resolution_proxy(m: Dict[str, Any]) -> str:
     return ""
 
 
-def fetch_prices_history_daily(clob_base: str, token_id: str, start_ts: int, end_ts: int, rate: RateLimiter) -> Dict[str, float]:
+async def fetch_prices_history_daily(
+    session: aiohttp.ClientSession,
+    clob_base: str,
+    token_id: str,
+    start_ts: int,
+    end_ts: int,
+    rate: RateLimiter,
+    db: Optional[sqlite3.Connection] = None,
+) -> List[Tuple[str, float]]:
     """
     Uses CLOB /prices-history with fidelity=1440 (daily).
-    Returns dict date->price.
+    Returns a date-sorted list of (date, price) pairs. Fetched windows and
+    the window size the server was last seen to accept are cached in `db`,
+    so re-runs over the same closed markets are served from disk instead of
+    re-walking the interval-too-long rejection ladder.
     """
     out: Dict[str, float] = {}
-    max_days = 30
+    accepted_days: Optional[int] = None
+    if db is not None:
+        row = db.execute("SELECT days FROM window_days WHERE token_id = ?", (token_id,)).fetchone()
+        if row is not None:
+            accepted_days = int(row[0])
     cur = start_ts
     while cur < end_ts:
-        window_days = max_days
+        # Ask for the whole remaining span up front, capped at the size this
+        # token was last seen to accept; halve on the CLOB "interval is too
+        # long" complaint until it accepts.
+        window_days = max(1, (end_ts - cur) // 86400)
+        if accepted_days is not None and accepted_days < window_days:
+            window_days = accepted_days
+        halved = False
         success = False
         while window_days >= 1 and not success:
             window_end = min(end_ts, cur + window_days * 86400)
+
+            if db is not None:
+                row = db.execute(
+                    "SELECT history FROM prices WHERE key = ?",
+                    (f"{token_id}:{cur}:{window_end}",),
+                ).fetchone()
+                if row is not None:
+                    for date, price in json_loads(row[0]):
+                        out[date] = price
+                    success = True
+                    cur = window_end + 1
+                    continue
+
             params = {"market": token_id, "startTs": cur, "endTs": window_end, "fidelity": 1440}
             try:
-                rate.wait()
-                data = http_get(f"{clob_base}/prices-history", params=params)
+                await rate.wait()
+                data = await http_get(session, f"{clob_base}/prices-history", params=params)
                 history = data.get("history", []) if isinstance(data, dict) else []
+                window: List[Tuple[str, float]] = []
+                max_t_seen = 0
                 for item in history:
                     t = int(item.get("t"))
                     p = float(item.get("p"))
+                    window.append((ts_to_utc_date(t), p))
                     out[ts_to_utc_date(t)] = p
+                    if t > max_t_seen:
+                        max_t_seen = t
+                if db is not None:
+                    db.execute(
+                        "INSERT OR REPLACE INTO prices (key, history) VALUES (?, ?)",
+                        (f"{token_id}:{cur}:{window_end}", json_dumps(window)),
+                    )
                 success = True
                 cur = window_end + 1
+                if halved:
+                    # Remember the accepted size so later windows (and
+                    # re-runs) start below the rejection threshold. Only
+                    # recorded after a rejection: a short final window
+                    # accepted first try says nothing about the cap.
+                    accepted_days = window_days
+                    if db is not None:
+                        db.execute(
+                            "INSERT OR REPLACE INTO window_days (token_id, days) VALUES (?, ?)",
+                            (token_id, window_days),
+                        )
+                if max_t_seen >= end_ts - 86400:
+                    # Series already reaches the last day; any further
+                    # window could only come back empty.
+                    cur = end_ts
             except Exception as e:
                 # CLOB sometimes complains about interval length: shrink.
                 if "interval is too long" in str(e).lower():
                     window_days = window_days // 2
+                    halved = True
                     continue
                 raise
         if not success:
             # advance one day to avoid infinite loops
             cur += 86400
-    return out
+    return sorted(out.items())
+
+
+async def bounded_fetch(
+    sem: asyncio.Semaphore,
+    session: aiohttp.ClientSession,
+    clob_base: str,
+    token_id: str,
+    start_ts: int,
+    end_ts: int,
+    rate: RateLimiter,
+    db: Optional[sqlite3.Connection] = None,
+) -> List[Tuple[str, float]]:
+    async with sem:
+        hist = await fetch_prices_history_daily(session, clob_base, token_id, start_ts, end_ts, rate, db=db)
+        if db is not None:
+            db.commit()
+        return hist
 
 
 # ---------------- Gemini classification: single character output ----------------
 
 def write_market_texts(path: str, markets: List[Dict[str, Any]]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("market_id,slug,title,description\n")
+    with open(path, "w", encoding="utf-8", buffering=1 << 20, newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(["market_id", "slug", "title", "description"])
         for m in markets:
             mid = m.get("id", "")
             slug = m.get("slug", "")
-            title = (m.get("question") or "").replace("\n", " ").replace(",", " ")
-            desc = (m.get("description") or "").replace("\n", " ").replace(",", " ")
-            f.write(f"{mid},{slug},{title},{desc}\n")
+            title = (m.get("question") or "").translate(TRANS)
+            desc = (m.get("description") or "").translate(TRANS)
+            writer.writerow([mid, slug, title, desc])
 
 
 def main() -> int:
@@ -304,81 +475,97 @@ def main() -> int:
     parser.add_argument("--months", type=int, default=6, help="How far back to look (months). Default: 6")
     parser.add_argument("--limit", type=int, default=100, help="Gamma API page size. Default: 100")
     parser.add_argument("--max-markets", type=int, default=20, help="Cap number of markets. Default: 20")
-    parser.add_argument("--rps", type=float, default=5.0, help="Requests per second (Gamma/CLOB). Default: 5")
+    parser.add_argument("--rps", type=float, default=5.0, help="Sustained requests per second (Gamma/CLOB). Default: 5")
+    parser.add_argument("--burst", type=float, default=20.0, help="Rate-limiter burst capacity (requests). Default: 20")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent CLOB history fetches. Default: 16")
     parser.add_argument("--gamma-base", type=str, default=os.getenv("POLY_GAMMA_BASE", DEFAULT_GAMMA_BASE))
     parser.add_argument("--clob-base", type=str, default=os.getenv("POLY_CLOB_BASE", DEFAULT_CLOB_BASE))
     parser.add_argument("--out", type=str, default=os.getenv("POLY_OUT", "polymarket_output"))
 
     parser.add_argument("--order", type=str, default="endDate", help="Gamma order field. Default: endDate")
     parser.add_argument("--ascending", type=str, default="false", help="Gamma ascending true/false. Default: false")
-    parser.add_argument("--use-api-date-filter", action="store_true", help="Use Gamma end_date_min filter for cutoff")
+    parser.add_argument("--no-api-date-filter", action="store_true", help="Disable the Gamma end_date_min cutoff filter")
 
     args = parser.parse_args()
 
+    return asyncio.run(run(args))
+
+
+async def run(args) -> int:
     os.makedirs(args.out, exist_ok=True)
 
-    rate = RateLimiter(args.rps)
+    rate = RateLimiter(args.rps, args.burst)
+    db = open_cache_db(args.out)
 
+    # Truncate the cutoff to the hour: a months-scale boundary doesn't need
+    # second precision, and a stable cutoff_iso keeps the Gamma page-cache
+    # key identical across re-runs inside the TTL.
     cutoff = dt.datetime.utcnow() - dt.timedelta(days=int(args.months * 30.4))
+    cutoff = cutoff.replace(minute=0, second=0, microsecond=0)
     cutoff_ts = int(cutoff.timestamp())
-    cutoff_iso = cutoff.replace(microsecond=0).isoformat() + "Z"
-
-    markets = fetch_markets(
-        args.gamma_base,
-        args.limit,
-        args.max_markets,
-        rate,
-        order=args.order,
-        ascending=(args.ascending.lower() == "true"),
-        end_date_min=cutoff_iso if args.use_api_date_filter else None,
+    cutoff_iso = cutoff.isoformat() + "Z"
+
+    # One pooled, keep-alive session for the whole run: connections to the
+    # gamma/CLOB hosts are reused instead of re-handshaking TLS per request.
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=32),
+        headers={"User-Agent": USER_AGENT},
+        timeout=aiohttp.ClientTimeout(total=30),
     )
-
-    filtered: List[Dict[str, Any]] = []
-    total = yesno_ok = date_ok = clob_ok = 0
-
-    for m in markets:
-        total += 1
-        if not is_yes_no_market(m):
-            continue
-        yesno_ok += 1
-
-        end_ts = effective_end_ts(m)
-        if not end_ts or end_ts < cutoff_ts:
-            continue
-        date_ok += 1
-
-        if len(parse_clob_token_ids(m.get("clobTokenIds"))) != 2:
-            continue
-        clob_ok += 1
-
-        filtered.append(m)
-
-    print(f"Filter counts: total={total}, yesno_ok={yesno_ok}, date_ok={date_ok}, clob_ok={clob_ok}, final={len(filtered)}")
-
-    # Save raw markets
-    summary_path = os.path.join(args.out, "markets.jsonl")
-    with open(summary_path, "w", encoding="utf-8") as fsum:
+    async with session:
+        filtered: List[Dict[str, Any]] = []
+        total = yesno_ok = date_ok = clob_ok = 0
+
+        async for m in fetch_markets(
+            session,
+            args.gamma_base,
+            args.limit,
+            rate,
+            order=args.order,
+            ascending=(args.ascending.lower() == "true"),
+            end_date_min=None if args.no_api_date_filter else cutoff_iso,
+            db=db,
+        ):
+            total += 1
+            if is_yes_no_market(m):
+                yesno_ok += 1
+
+                end_ts = effective_end_ts(m)
+                if end_ts and end_ts >= cutoff_ts:
+                    date_ok += 1
+
+                    clob_ids = parse_clob_token_ids(m.get("clobTokenIds"))
+                    if len(clob_ids) == 2:
+                        m["_clob_ids"] = clob_ids
+                        clob_ok += 1
+                        filtered.append(m)
+
+            if args.max_markets and total >= args.max_markets:
+                break
+
+        print(f"Filter counts: total={total}, yesno_ok={yesno_ok}, date_ok={date_ok}, clob_ok={clob_ok}, final={len(filtered)}")
+
+        # Save raw markets
+        summary_path = os.path.join(args.out, "markets.jsonl")
+        with open(summary_path, "wb") as fsum:
+            if filtered:
+                # Strip the parse-cache keys so the dump stays raw Gamma data.
+                fsum.write(b"\n".join(
+                    json_dumps({k: v for k, v in m.items() if not k.startswith("_")})
+                    for m in filtered
+                ) + b"\n")
+
+        daily_path = os.path.join(args.out, "daily.csv")
+        texts_path = os.path.join(args.out, "market_texts.csv")
+
+        write_market_texts(texts_path, filtered)
+
+        # Phase 1: derive everything that needs no network, per market.
+        prepared: List[Dict[str, Any]] = []
         for m in filtered:
-            fsum.write(json.dumps(m) + "\n")
-
-    daily_path = os.path.join(args.out, "daily.csv")
-    texts_path = os.path.join(args.out, "market_texts.csv")
-
-    write_market_texts(texts_path, filtered)
-
-    with open(daily_path, "w", encoding="utf-8") as fdaily:
-        fdaily.write(
-            "market_id,slug,title,date,yes_price,no_price,total_volume,final_outcome_proxy,uma_resolution_status,"
-            "T_days,start_ts,end_date_ts,closed_ts\n"
-        )
-
-        total_m = len(filtered)
-        for idx, m in enumerate(filtered, start=1):
             market_id = m.get("id")
             slug = (m.get("slug") or "").strip()
-            title = (m.get("title") or "").replace("\n", " ").replace("\r", " ").strip()
-            description = (m.get("description") or "").replace("\n", " ").replace("\r", " ").strip()
-            print(f"[{idx}/{total_m}] {slug}")
+            title = (m.get("title") or "").translate(NEWLINE_TRANS).strip()
 
             # Total volume
             total_volume = m.get("volumeNum")
@@ -392,10 +579,8 @@ def main() -> int:
             final_outcome_proxy = infer_resolution_proxy(m)
             uma_status = m.get("umaResolutionStatus", "")
 
-            outcomes, _ = parse_outcomes(m.get("outcomes"), m.get("outcomePrices", []))
-            clob_ids = parse_clob_token_ids(m.get("clobTokenIds"))
-            if len(clob_ids) != 2:
-                continue
+            outcomes = m["_outcomes"]
+            clob_ids = m["_clob_ids"]
 
             # Map YES/NO to clob token ids
             if outcomes[0].strip().lower() == "yes":
@@ -422,39 +607,89 @@ def main() -> int:
             else:
                 T_days = ""
 
-            title_out = json.dumps(title, ensure_ascii=False)
-
-            # Fetch daily prices
-            try:
-                yes_hist = fetch_prices_history_daily(args.clob_base, yes_token, start_ts, end_ts, rate)
-                no_hist = fetch_prices_history_daily(args.clob_base, no_token, start_ts, end_ts, rate)
-            except Exception as e:
-                print(f"Warning: price history failed for {slug}: {e}", file=sys.stderr)
-                continue
-
-            all_dates = utc_date_range(start_ts, end_ts)
-            last_yes: Optional[float] = None
-            last_no: Optional[float] = None
-
-            for d in all_dates:
-                if d in yes_hist:
-                    last_yes = yes_hist[d]
-                if d in no_hist:
-                    last_no = no_hist[d]
-
-                yes_p = last_yes if last_yes is not None else ""
-                no_p = last_no if last_no is not None else ""
+            prepared.append({
+                "market_id": market_id,
+                "slug": slug,
+                "title": title,
+                "total_volume": total_volume,
+                "final_outcome_proxy": final_outcome_proxy,
+                "uma_status": uma_status,
+                "yes_token": yes_token,
+                "no_token": no_token,
+                "start_ts": start_ts,
+                "end_date_ts": end_date_ts,
+                "closed_ts": closed_ts,
+                "end_ts": end_ts,
+                "T_days": T_days,
+            })
+
+        # Phase 2: fire every (market x token) history fetch at once, bounded
+        # by the semaphore; CSV writing is fully decoupled from network wait.
+        sem = asyncio.Semaphore(args.concurrency)
+        print(f"Fetching price histories for {len(prepared)} markets ...")
+        results = await asyncio.gather(
+            *[
+                bounded_fetch(sem, session, args.clob_base, p[tok], p["start_ts"], p["end_ts"], rate, db=db)
+                for p in prepared
+                for tok in ("yes_token", "no_token")
+            ],
+            return_exceptions=True,
+        )
 
-                fdaily.write(
-                    f"{market_id},{slug},{title_out},{d},"
-                    f"{yes_p},{no_p},{total_volume},{final_outcome_proxy},{uma_status},"
-                    f"{T_days},{start_ts or ''},{end_date_ts or ''},{closed_ts or ''}\n"
-                )
+        # Phase 3: write the daily series from the joined results.
+        with open(daily_path, "w", encoding="utf-8", buffering=1 << 20, newline="") as fdaily:
+            writer = csv.writer(fdaily, quoting=csv.QUOTE_MINIMAL)
+            writer.writerow([
+                "market_id", "slug", "title", "date", "yes_price", "no_price", "total_volume",
+                "final_outcome_proxy", "uma_resolution_status", "T_days", "start_ts", "end_date_ts", "closed_ts",
+            ])
+
+            total_m = len(prepared)
+            for idx, (p, yes_hist, no_hist) in enumerate(zip(prepared, results[0::2], results[1::2]), start=1):
+                slug = p["slug"]
+                print(f"[{idx}/{total_m}] {slug}")
+                if isinstance(yes_hist, Exception) or isinstance(no_hist, Exception):
+                    err = yes_hist if isinstance(yes_hist, Exception) else no_hist
+                    print(f"Warning: price history failed for {slug}: {err}", file=sys.stderr)
+                    continue
 
-    print(f"Wrote markets: {summary_path}")
-    print(f"Wrote daily series: {daily_path}")
-    print(f"Wrote market texts: {texts_path}")
-    return 0
+                all_dates = utc_date_range(p["start_ts"], p["end_ts"])
+                last_yes: Optional[float] = None
+                last_no: Optional[float] = None
+
+                # Everything but (date, yes, no) is constant per market.
+                prefix = [p["market_id"], slug, p["title"]]
+                suffix = [
+                    p["total_volume"], p["final_outcome_proxy"], p["uma_status"],
+                    p["T_days"], p["start_ts"] or "", p["end_date_ts"] or "", p["closed_ts"] or "",
+                ]
+
+                # Forward-fill by sweeping both sorted histories alongside
+                # all_dates instead of probing a dict per day.
+                i_yes = i_no = 0
+                n_yes, n_no = len(yes_hist), len(no_hist)
+                rows: List[List[Any]] = []
+                for d in all_dates:
+                    while i_yes < n_yes and yes_hist[i_yes][0] <= d:
+                        last_yes = yes_hist[i_yes][1]
+                        i_yes += 1
+                    while i_no < n_no and no_hist[i_no][0] <= d:
+                        last_no = no_hist[i_no][1]
+                        i_no += 1
+
+                    yes_p = last_yes if last_yes is not None else ""
+                    no_p = last_no if last_no is not None else ""
+
+                    rows.append(prefix + [d, yes_p, no_p] + suffix)
+                writer.writerows(rows)
+
+        db.commit()
+        db.close()
+
+        print(f"Wrote markets: {summary_path}")
+        print(f"Wrote daily series: {daily_path}")
+        print(f"Wrote market texts: {texts_path}")
+        return 0
 
 
 if __name__ == "__main__":